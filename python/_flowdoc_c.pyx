@@ -0,0 +1,46 @@
+# cython: language_level=3
+"""
+Optional compiled helpers for flowdoc.py
+
+Build in place with `cythonize -i _flowdoc_c.pyx`; flowdoc.py falls back
+to its pure Python code paths when this module is not available.
+"""
+
+cdef object _parse_item(str v):
+    cdef Py_ssize_t n = len(v)
+    if v == 'true':
+        return True
+    if v == 'false':
+        return False
+    if n > 1 and v[0] == '"' and v[n - 1] == '"':
+        return v[1:n - 1]
+    if n > 0 and v[0] == '[' and v[n - 1] == ']':
+        inner = v[1:n - 1].strip()
+        if inner == '':
+            return []
+        return parse_list(inner)
+    try:
+        if '.' in v:
+            return float(v)
+        return int(v)
+    except Exception:
+        return v
+
+def parse_list(str inner):
+    """Parse the comma-separated body of a list value (brackets removed)"""
+    cdef Py_ssize_t n = len(inner)
+    cdef Py_ssize_t start = 0
+    cdef Py_ssize_t i, a, b
+    cdef list result = []
+    for i in range(n + 1):
+        if i < n and inner[i] != ',':
+            continue
+        a = start
+        b = i
+        while a < b and inner[a].isspace():
+            a += 1
+        while b > a and inner[b - 1].isspace():
+            b -= 1
+        result.append(_parse_item(inner[a:b]))
+        start = i + 1
+    return result
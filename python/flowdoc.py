@@ -4,18 +4,55 @@ FlowDoc Python implementation
 Implements ParseFlow, StringifyFlow, LoadFlow, SaveFlow, LoadFlowb, SaveFlowb,
 ConvertFlowToJSON, ConvertJSONToFlow, and mapping model support
 """
-import re
+import functools
+import io
+import mmap
+import os
 import json
-import msgpack
-from typing import Any, Dict, List, Optional
+import struct
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, date
 
+try:
+    import msgspec
+except ImportError:  # fall back to the reference msgpack package
+    msgspec = None
+    import msgpack
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from _flowdoc_c import parse_list as _parse_list_c
+except ImportError:  # extension not built, use the pure Python list parser
+    _parse_list_c = None
+
+# LoadFlow reads and tokenizes files in blocks of about this many bytes
+_READ_BLOCK_SIZE = 1 << 20
+
+# Indent strings for StringifyFlow, indexed by column
+_PADS = tuple(' ' * i for i in range(128))
+
+if msgspec is not None:
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+    _msgpack_decoder = msgspec.msgpack.Decoder()
+    _FLOAT32 = struct.Struct('>Bf')
+else:
+    # Packers keep internal buffer state, so each thread gets its own
+    _msgpack_local = threading.local()
+
 # ============================================
 # Mapping Model Support
 # ============================================
 
 class FieldDefinition:
     """Definition for a single field in a model"""
+    __slots__ = ("full_name", "alias", "field_type", "field_id")
+
     def __init__(self, full_name: str, alias: str, field_type: str = "string", field_id: Optional[int] = None):
         self.full_name = full_name
         self.alias = alias
@@ -24,17 +61,36 @@ class FieldDefinition:
 
 class ModelDefinition:
     """Definition for a complete model"""
+    __slots__ = ("name", "fields", "alias_map", "resolve")
+
     def __init__(self, name: str):
         self.name = name
         self.fields: Dict[str, FieldDefinition] = {}  # indexed by full name
         self.alias_map: Dict[str, str] = {}  # alias -> full name
+        # alias or full name -> (full name, value converter for the field's
+        # type), aliases taking precedence
+        self.resolve: Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]] = {}
 
     def add_field(self, field: FieldDefinition):
-        self.fields[field.full_name] = field
-        self.alias_map[field.alias] = field.full_name
+        full_name = field.full_name
+        replacing = full_name in self.fields
+        self.fields[full_name] = field
+        self.alias_map[field.alias] = full_name
+
+        entry = (full_name, _get_coercer(field.field_type))
+        self.resolve[field.alias] = entry
+        if full_name not in self.alias_map:  # aliases take precedence
+            self.resolve[full_name] = entry
+        if replacing:
+            # Aliases of the field being replaced now resolve to this one
+            for alias, target in self.alias_map.items():
+                if target == full_name:
+                    self.resolve[alias] = entry
 
 class ModelRegistry:
     """Registry containing multiple model definitions"""
+    __slots__ = ("models",)
+
     def __init__(self):
         self.models: Dict[str, ModelDefinition] = {}
 
@@ -44,51 +100,83 @@ class ModelRegistry:
     def get_model(self, name: str) -> Optional[ModelDefinition]:
         return self.models.get(name)
 
-def _parse_typed_value(raw: str, field_type: str) -> Any:
-    """Parse value with type hint"""
-    v = raw.strip()
-
-    if field_type == "bool":
-        if v == "true":
-            return True
-        if v == "false":
-            return False
-        raise ValueError(f"Invalid boolean value: {v}")
-
-    if field_type == "int":
-        return int(v)
-
-    if field_type == "float":
-        return float(v)
-
-    if field_type == "date":
-        # Parse YYYY-MM-DD format
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', v):
-            return v  # Keep as string for JSON compatibility
-        raise ValueError(f"Invalid date format (expected YYYY-MM-DD): {v}")
-
-    if field_type == "datetime":
-        # Parse ISO 8601 datetime
-        if re.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}', v):
-            return v  # Keep as string for JSON compatibility
-        raise ValueError(f"Invalid datetime format (expected ISO 8601): {v}")
-
-    # string type - remove quotes if present
+def _parse_bool(v: str) -> bool:
+    if v == "true":
+        return True
+    if v == "false":
+        return False
+    raise ValueError(f"Invalid boolean value: {v}")
+
+def _is_date(v: str) -> bool:
+    # YYYY-MM-DD; isdecimal() accepts the same digits as the \d regex class
+    return (
+        v[4:5] == '-' and v[7:8] == '-'
+        and v[:4].isdecimal() and v[5:7].isdecimal() and v[8:10].isdecimal()
+    )
+
+def _parse_date(v: str) -> str:
+    # Parse YYYY-MM-DD format
+    if len(v) == 10 and _is_date(v):
+        return v  # Keep as string for JSON compatibility
+    raise ValueError(f"Invalid date format (expected YYYY-MM-DD): {v}")
+
+def _parse_datetime(v: str) -> str:
+    # Parse ISO 8601 datetime (only the YYYY-MM-DDTHH:MM:SS prefix is checked)
+    if (
+        len(v) >= 19 and _is_date(v) and v[10] == 'T' and v[13] == ':' and v[16] == ':'
+        and v[11:13].isdecimal() and v[14:16].isdecimal() and v[17:19].isdecimal()
+    ):
+        return v  # Keep as string for JSON compatibility
+    raise ValueError(f"Invalid datetime format (expected ISO 8601): {v}")
+
+def _parse_string(v: str) -> str:
+    # remove quotes if present
     if v.startswith('"') and v.endswith('"'):
         return v[1:-1]
-
     return v
 
-def _extract_models_from_dict(data: Dict[str, Any]) -> Optional[ModelRegistry]:
-    """Extract $models from parsed dictionary"""
-    if "$models" not in data:
-        return None
+_TYPE_PARSERS = {
+    "bool": _parse_bool,
+    "int": int,
+    "float": float,
+    "date": _parse_date,
+    "datetime": _parse_datetime,
+    "string": _parse_string,
+}
+
+# Field types whose values come out of ParseFlow already converted; strings
+# are not listed since they may still carry quotes to strip
+_NATIVE_TYPES = {"int": int, "float": float, "bool": bool}
+
+def _make_coercer(native: Optional[type], parse: Callable[[str], Any]) -> Callable[[Any], Any]:
+    def coerce(value: Any) -> Any:
+        # Values ParseFlow already produced with the field's type pass through
+        if type(value) is native:
+            return value
+        try:
+            return parse(str(value).strip())
+        except (ValueError, TypeError):
+            return value
+    return coerce
+
+# One converter per known type name, built once; the table never grows
+_COERCERS = {
+    name: _make_coercer(_NATIVE_TYPES.get(name), parse)
+    for name, parse in _TYPE_PARSERS.items()
+}
+_STRING_COERCER = _COERCERS["string"]
+
+def _get_coercer(field_type: str) -> Callable[[Any], Any]:
+    """Return the value converter specialized to field_type"""
+    try:
+        return _COERCERS.get(field_type, _STRING_COERCER)
+    except TypeError:
+        # Unhashable type names are treated as strings, like unknown ones
+        return _STRING_COERCER
 
+def _extract_models(models_data: Dict[str, Any]) -> ModelRegistry:
+    """Build a registry from a parsed $models section"""
     registry = ModelRegistry()
-    models_data = data["$models"]
-
-    if not isinstance(models_data, dict):
-        return None
 
     for model_name, model_spec in models_data.items():
         if not isinstance(model_spec, dict) or "fields" not in model_spec:
@@ -106,6 +194,8 @@ def _extract_models_from_dict(data: Dict[str, Any]) -> Optional[ModelRegistry]:
 
             alias = field_spec.get("alias", full_name)
             field_type = field_spec.get("type", "string")
+            if isinstance(field_type, str):
+                field_type = sys.intern(field_type)
             field_id = field_spec.get("id")
 
             field_def = FieldDefinition(full_name, alias, field_type, field_id)
@@ -116,63 +206,75 @@ def _extract_models_from_dict(data: Dict[str, Any]) -> Optional[ModelRegistry]:
     return registry
 
 def _apply_model_to_dict(data: Dict[str, Any], model: ModelDefinition) -> Dict[str, Any]:
-    """Apply model to expand aliases to full field names"""
-    result = {}
-
-    for key, value in data.items():
-        # Check if this key is an alias
-        full_name = model.alias_map.get(key, key)
-        field_def = model.fields.get(full_name)
-
-        # Process value
-        if isinstance(value, dict):
-            # Recursively apply model to nested dicts
-            result[full_name] = _apply_model_to_dict(value, model)
-        elif isinstance(value, list):
-            # Apply model to list items that are dicts
-            result[full_name] = [
-                _apply_model_to_dict(item, model) if isinstance(item, dict) else item
-                for item in value
-            ]
-        else:
-            # Apply type conversion if field definition exists
-            if field_def:
-                try:
-                    result[full_name] = _parse_typed_value(str(value), field_def.field_type)
-                except (ValueError, TypeError):
-                    result[full_name] = value
+    """
+    Apply model to expand aliases to full field names.
+    data is rewritten in place (nested dicts and lists included) and returned.
+    """
+    resolve_get = model.resolve.get
+    # Nested dicts are queued rather than recursed into
+    stack = [data]
+
+    while stack:
+        obj = stack.pop()
+        # Re-inserting every key into the emptied dict keeps the original
+        # key order with aliases replaced by full names
+        items = list(obj.items())
+        obj.clear()
+        for key, value in items:
+            # Check if this key is an alias
+            full_name, coerce = resolve_get(key) or (key, None)
+
+            # Process value
+            if isinstance(value, dict):
+                stack.append(value)
+                obj[full_name] = value
+            elif isinstance(value, list):
+                # Apply model to list items that are dicts
+                stack.extend(item for item in value if isinstance(item, dict))
+                obj[full_name] = value
             else:
-                result[full_name] = value
+                # Apply type conversion if field definition exists
+                if coerce is not None:
+                    value = coerce(value)
+                obj[full_name] = value
 
-    return result
+    return data
 
 # ============================================
 # Core Parsing Functions
 # ============================================
 
 def _tokenize_lines(text: str) -> List[str]:
-    text = text.replace('\t', '  ')
-    lines = []
-    for line in text.splitlines():
-        no_comment = line.split('#', 1)[0]
-        if no_comment.strip():
-            lines.append(no_comment.rstrip())
+    lines: List[str] = []
+    append = lines.append
+    # str.replace hands back the same string when there are no tabs
+    for line in text.replace('\t', '  ').splitlines():
+        if '#' in line:
+            line = line[:line.index('#')]
+        # rstrip() leaves nothing exactly when the line is blank
+        line = line.rstrip()
+        if line:
+            append(line)
     return lines
 
-def _parse_value(raw: str) -> Any:
-    v = raw.strip()
+def _tokenize_file(f) -> Iterator[str]:
+    """Tokenize an open text file a block of whole lines at a time"""
+    while True:
+        block = f.readlines(_READ_BLOCK_SIZE)
+        if not block:
+            return
+        yield from _tokenize_lines(''.join(block))
+
+@functools.lru_cache(maxsize=4096)
+def _parse_scalar(v: str) -> Any:
+    # Only immutable results come out of here, so cached values are safe
+    # to share between documents
     if v == 'true':
         return True
     if v == 'false':
         return False
-    if re.match(r'^".*"$', v):
+    if v[:1] == '"' and len(v) > 1 and v[-1] == '"':
         return v[1:-1]
-    if re.match(r'^\[.*\]$', v):
-        inner = v[1:-1].strip()
-        if inner == '':
-            return []
-        parts = [p.strip() for p in inner.split(',')]
-        return [_parse_value(p) for p in parts]
     try:
         if '.' in v:
             return float(v)
@@ -180,79 +282,372 @@ def _parse_value(raw: str) -> Any:
     except Exception:
         return v
 
-def ParseFlow(text: str) -> Dict[str, Any]:
-    lines = _tokenize_lines(text)
-    root: Dict[str, Any] = {}
-    stack = [(0, root)]
+def _parse_value(raw: str) -> Any:
+    v = raw.strip()
+    if v[:1] == '[' and v[-1] == ']':
+        # Lists are mutable, so they are built fresh and kept out of the cache
+        inner = v[1:-1].strip()
+        if inner == '':
+            return []
+        if _parse_list_c is not None:
+            return _parse_list_c(inner)
+        parts = [p.strip() for p in inner.split(',')]
+        return [_parse_value(p) for p in parts]
+    return _parse_scalar(v)
+
+def _iter_entries(lines: Iterable[str]) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """Yield (indent, key, raw) for each tokenized line; raw is None for sections"""
     for line in lines:
-        leading = len(re.match(r'^\s*', line).group(0))
-        indent = leading // 2
-        trimmed = line.strip()
+        # Lines are already tab-expanded and rstripped by _tokenize_lines.
+        # Any leading whitespace (not just ASCII spaces) counts as indent.
+        trimmed = line.lstrip()
+        leading = len(line) - len(trimmed)
         if trimmed.endswith(':'):
-            key = trimmed[:-1].strip()
+            yield leading // 2, trimmed[:-1].rstrip(), None
+        else:
+            key, sep, raw = trimmed.partition('=')
+            if sep:
+                yield leading // 2, key.rstrip(), raw
+
+def _build_tree(entries, on_section=None) -> Dict[str, Any]:
+    root: Dict[str, Any] = {}
+    # Open sections live in parallel indent/object arrays addressed by a
+    # top cursor; closing a section just moves the cursor down
+    indents = [0] * 64
+    objs: List[Optional[Dict[str, Any]]] = [None] * 64
+    objs[0] = root
+    top = 0
+    current = root
+    section_key = None
+    for indent, key, raw in entries:
+        if indents[top] > indent:
+            while top and indents[top] > indent:
+                top -= 1
+                if top == 0 and on_section is not None:
+                    on_section(root, section_key, objs[1])
+            current = objs[top]
+        if raw is None:
+            if top == 0:
+                section_key = key
             obj: Dict[str, Any] = {}
-            while stack and stack[-1][0] >= indent:
-                stack.pop()
-            stack[-1][1][key] = obj
-            stack.append((indent+1, obj))
+            current[key] = obj
+            top += 1
+            if top == len(indents):
+                indents.extend([0] * top)
+                objs.extend([None] * top)
+            indents[top] = indent + 1
+            objs[top] = obj
+            current = obj
         else:
-            if '=' not in trimmed:
-                continue
-            key, raw = trimmed.split('=', 1)
-            key = key.strip()
-            raw = raw.strip()
-            while stack and stack[-1][0] > indent:
-                stack.pop()
-            stack[-1][1][key] = _parse_value(raw)
+            current[key] = _parse_value(raw)
+    if on_section is not None and top > 0:
+        on_section(root, section_key, objs[1])
     return root
 
+# ============================================
+# Compiled Lexer (optional, requires numba)
+# ============================================
+
+# The compiled lexer is opt-in (FLOWDOC_JIT=1): compiling or loading the
+# kernels costs far more than it saves on typical documents, and even
+# warm it only pays off on inputs of several MB.
+_JIT_ENABLED = os.environ.get('FLOWDOC_JIT', '') not in ('', '0')
+_JIT_MIN_SIZE = 4 << 20
+
+_jit_kernels = None  # compiled on first use; False if disabled or unusable
+
+def _count_line_breaks(buf) -> int:
+    count = 0
+    for c in buf:
+        if c == 10 or c == 13:
+            count += 1
+    return count
+
+def _scan_lines_ascii(buf, indents, keys, values):
+    """
+    Lex an ASCII buffer. For each entry the indent is written to
+    indents (bit-inverted for sections), and the key and raw value are
+    appended to keys and values as newline-terminated runs, so the caller
+    can split them out with a single str.split() each. Returns the number
+    of entries and the bytes used in keys and values, or a count of -1 when
+    the buffer holds tabs or control characters that str.splitlines() or
+    str.strip() treat specially, so the caller can fall back to the Python
+    lexer.
+    """
+    n = len(buf)
+    count = 0
+    kpos = 0
+    vpos = 0
+    pos = 0
+    while pos < n:
+        start = pos
+        end = pos
+        comment = False
+        while pos < n:
+            c = buf[pos]
+            if c == 10 or c == 13:
+                break
+            if c == 9 or c == 11 or c == 12 or (c >= 28 and c <= 31):
+                return -1, 0, 0
+            if c == 35:
+                comment = True
+            elif not comment:
+                end = pos + 1
+            pos += 1
+        pos += 1
+        while end > start and buf[end - 1] == 32:
+            end -= 1
+        lead = start
+        while lead < end and buf[lead] == 32:
+            lead += 1
+        if lead == end:
+            continue
+        indent = (lead - start) // 2
+        if buf[end - 1] == 58:
+            key_end = end - 1
+            value_start = end
+            indent = ~indent
+        else:
+            key_end = lead
+            while key_end < end and buf[key_end] != 61:
+                key_end += 1
+            if key_end == end:
+                continue
+            value_start = key_end + 1
+        while key_end > lead and buf[key_end - 1] == 32:
+            key_end -= 1
+        indents[count] = indent
+        count += 1
+        for i in range(lead, key_end):
+            keys[kpos] = buf[i]
+            kpos += 1
+        keys[kpos] = 10
+        kpos += 1
+        for i in range(value_start, end):
+            values[vpos] = buf[i]
+            vpos += 1
+        values[vpos] = 10
+        vpos += 1
+    return count, kpos, vpos
+
+def _get_jit_kernels():
+    """Return the compiled (_count_line_breaks, _scan_lines_ascii) pair, or False"""
+    global _jit_kernels
+    if _jit_kernels is None:
+        if not _JIT_ENABLED:
+            return False
+        try:
+            import numba
+        except ImportError:
+            _jit_kernels = False
+        else:
+            _jit_kernels = (
+                numba.njit(cache=True)(_count_line_breaks),
+                numba.njit(cache=True)(_scan_lines_ascii),
+            )
+    return _jit_kernels
+
+def _iter_entries_jit(data) -> Optional[Iterator[Tuple[int, str, Optional[str]]]]:
+    """
+    Lex an ASCII bytes-like buffer with the compiled lexer; None if numba is
+    unavailable or the buffer needs the Python lexer.
+    """
+    global _jit_kernels
+    kernels = _get_jit_kernels()
+    if not kernels:
+        return None
+    count_line_breaks, scan = kernels
+    import numpy as np
+    buf = np.frombuffer(data, dtype=np.uint8)
+    try:
+        # numba compiles (or loads its cache) on the first call, so errors
+        # from that surface here rather than in _get_jit_kernels
+        lines = count_line_breaks(buf) + 1
+        indents = np.empty(lines, dtype=np.int64)
+        keys = np.empty(len(buf) + lines, dtype=np.uint8)
+        values = np.empty(len(buf) + lines, dtype=np.uint8)
+        count, key_size, value_size = scan(buf, indents, keys, values)
+    except Exception:
+        _jit_kernels = False
+        return None
+    finally:
+        del buf
+    if count < 0:
+        return None
+    # Each run is newline-terminated, so split() leaves a trailing ''
+    # that zip() drops against the shorter indents list.
+    key_list = keys[:key_size].tobytes().decode('ascii').split('\n')
+    value_list = values[:value_size].tobytes().decode('ascii').split('\n')
+    return (
+        (indent, key, raw) if indent >= 0 else (~indent, key, None)
+        for indent, key, raw in zip(indents[:count].tolist(), key_list, value_list)
+    )
+
+def _iter_entries_mmap(path: str) -> Optional[Iterator[Tuple[int, str, Optional[str]]]]:
+    """Lex a file through the compiled lexer without reading it into a str"""
+    import numpy as np
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        is_ascii = buf.max() < 0x80
+        del buf
+        # The returned entries are built from copies, so nothing refers
+        # to the map once this returns
+        return _iter_entries_jit(mm) if is_ascii else None
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # a view is still held by a propagating exception's frames
+
+def ParseFlow(text: str, on_section=None) -> Dict[str, Any]:
+    """
+    Parse FlowDoc text into a dict.
+    If given, on_section(root, key, obj) is called as soon as each top-level
+    section is complete and may replace or remove root[key].
+    """
+    if _JIT_ENABLED and len(text) >= _JIT_MIN_SIZE and text.isascii():
+        entries = _iter_entries_jit(text.replace('\t', '  ').encode('ascii'))
+        if entries is not None:
+            return _build_tree(entries, on_section)
+    return _build_tree(_iter_entries(_tokenize_lines(text)), on_section)
+
+def _has_whitespace(v: str) -> bool:
+    # split() drops whitespace using the same character class as the regex
+    # \s, so a single part as long as v means there was none to drop
+    parts = v.split(None, 1)
+    return len(parts) != 1 or len(parts[0]) != len(v)
+
+def _stringify_str(v: str) -> str:
+    if v == '' or _has_whitespace(v):
+        return '"' + v + '"'
+    return v
+
+def _stringify_bool(v: bool) -> str:
+    return 'true' if v else 'false'
+
+def _stringify_list(v: list) -> str:
+    return '[' + ', '.join(_stringify_value(x) for x in v) + ']'
+
+# Exact-type handlers; subclasses go through the isinstance checks below
+_STRINGIFY_DISPATCH = {
+    str: _stringify_str,
+    bool: _stringify_bool,
+    int: str,
+    float: str,
+    list: _stringify_list,
+}
+
 def _stringify_value(v: Any) -> str:
+    handler = _STRINGIFY_DISPATCH.get(type(v))
+    if handler is not None:
+        return handler(v)
     if isinstance(v, str):
-        if re.search(r'\s', v) or v == '':
-            return '"' + v + '"'
-        return v
+        return _stringify_str(v)
     if isinstance(v, bool):
-        return 'true' if v else 'false'
+        return _stringify_bool(v)
     if isinstance(v, (int, float)):
         return str(v)
     if isinstance(v, list):
-        return '[' + ', '.join(_stringify_value(x) for x in v) + ']'
+        return _stringify_list(v)
     return ''
 
-def _stringify_object(obj: Dict[str, Any], indent: int = 0) -> str:
-    lines: List[str] = []
-    pad = ' ' * indent
+def _stringify_into(buf: io.StringIO, obj: Dict[str, Any], indent: int = 0):
+    if not obj:
+        # An empty section body is written as a blank line
+        buf.write('\n')
+        return
+    pad = _PADS[indent] if indent < 128 else ' ' * indent
+    # One write per line; separate writes for each piece cost more than
+    # formatting the line first
     for k, v in obj.items():
         if isinstance(v, dict):
-            lines.append(f"{pad}{k}:")
-            lines.append(_stringify_object(v, indent + 2))
+            buf.write(f"{pad}{k}:\n")
+            _stringify_into(buf, v, indent + 2)
         else:
-            lines.append(f"{pad}{k} = {_stringify_value(v)}")
-    return '\n'.join(lines)
+            buf.write(f"{pad}{k} = {_stringify_value(v)}\n")
 
 def StringifyFlow(obj: Dict[str, Any]) -> str:
-    return _stringify_object(obj, 0) + '\n'
+    buf = io.StringIO()
+    _stringify_into(buf, obj, 0)
+    return buf.getvalue()
 
 def LoadFlow(path: str) -> Dict[str, Any]:
-    with open(path, 'r', encoding='utf8') as f:
-        return ParseFlow(f.read())
+    size = os.path.getsize(path)
+    if _JIT_ENABLED and size and size >= _JIT_MIN_SIZE and _get_jit_kernels():
+        entries = _iter_entries_mmap(path)
+        if entries is not None:
+            return _build_tree(entries)
+    # Stream the file so the whole text never has to be held at once
+    with open(path, 'r', encoding='utf8', buffering=_READ_BLOCK_SIZE) as f:
+        return _build_tree(_iter_entries(_tokenize_file(f)))
 
 def SaveFlow(path: str, obj: Dict[str, Any]):
     with open(path, 'w', encoding='utf8') as f:
         f.write(StringifyFlow(obj))
 
+def _get_packer(float32: bool = False):
+    attr = 'packer32' if float32 else 'packer'
+    packer = getattr(_msgpack_local, attr, None)
+    if packer is None:
+        packer = msgpack.Packer(use_bin_type=True, use_single_float=float32)
+        setattr(_msgpack_local, attr, packer)
+    return packer
+
+def _single_floats(obj: Any) -> Any:
+    """Copy obj with floats replaced by pre-encoded msgpack float32 values"""
+    if isinstance(obj, float):
+        return msgspec.Raw(_FLOAT32.pack(0xca, obj))
+    if isinstance(obj, dict):
+        return {k: _single_floats(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_single_floats(v) for v in obj]
+    return obj
+
 def LoadFlowb(path: str) -> Dict[str, Any]:
     with open(path, 'rb') as f:
         data = f.read()
+    if msgspec is not None:
+        return _msgpack_decoder.decode(data)
     return msgpack.unpackb(data, raw=False)
 
-def SaveFlowb(path: str, obj: Dict[str, Any]):
-    data = msgpack.packb(obj, use_bin_type=True)
+def SaveFlowb(path: str, obj: Dict[str, Any], float32: bool = False):
+    """
+    Encode obj to MessagePack and write it to path.
+    With float32=True, floats are stored in single precision, halving
+    their size at the cost of precision.
+    """
+    if msgspec is not None:
+        data = bytearray()
+        _msgpack_encoder.encode_into(_single_floats(obj) if float32 else obj, data)
+    else:
+        data = _get_packer(float32).pack(obj)
     with open(path, 'wb') as f:
         f.write(data)
 
 def ConvertFlowToJSON(flowText: str) -> str:
-    return json.dumps(ParseFlow(flowText), indent=2)
+    """
+    Convert FlowDoc text to indented JSON.
+    With orjson installed the output is equivalent to json.dumps but not
+    byte-identical: non-ASCII characters are written unescaped and float
+    exponents are shorter (1e+30 becomes 1e30).
+    """
+    data = ParseFlow(flowText)
+    if orjson is not None:
+        try:
+            out = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers wider than 64 bits
+        else:
+            # ParseFlow never yields None, so a bare null token is a float
+            # that overflowed to inf, which orjson cannot represent;
+            # json.dumps writes it as Infinity. Indented output puts every
+            # value on its own line and escapes newlines inside strings, so
+            # only a bare null can sit right before a line break.
+            if b'null\n' not in out and b'null,\n' not in out:
+                return out.decode()
+    return json.dumps(data, indent=2)
 
 def ConvertJSONToFlow(jsonText: str) -> str:
     obj = json.loads(jsonText)
@@ -264,43 +659,72 @@ def ParseFlowWithModel(text: str, registry: Optional[ModelRegistry] = None) -> D
     If registry is None, attempts to extract $models from the text.
     Applies model transformation if use_model directive is found.
     """
-    # First, parse normally
-    data = ParseFlow(text)
+    extract = registry is None
+    models_obj: Optional[Dict[str, Any]] = None  # latest $models section, not yet built
+    failed: Optional[Dict[str, Any]] = None  # models_obj that could not be built
+    model: Optional[ModelDefinition] = None
+    pending: Dict[str, None] = {}  # sections completed before the model was known
+
+    def on_section(root: Dict[str, Any], key: str, obj: Dict[str, Any]):
+        nonlocal registry, models_obj, failed, model
+        if key == "$models":
+            # Model definitions are consumed here and never reach the result.
+            # A later $models may still replace this one, so the registry is
+            # only built once a section actually needs it
+            del root[key]
+            if extract:
+                models_obj = obj
+                registry = None
+            return
+        if model is None:
+            model_name = root.get("use_model")
+            if type(model_name) is str:
+                if models_obj is not None and models_obj is not failed:
+                    try:
+                        registry = _extract_models(models_obj)
+                        models_obj = None
+                    except Exception:
+                        # Raised again below if this $models is still in effect
+                        failed = models_obj
+                if registry is not None:
+                    model = registry.get_model(model_name)
+        if model is None:
+            pending[key] = None
+        else:
+            pending.pop(key, None)
+            _apply_model_to_dict(obj, model)
 
-    # Extract or use provided registry
-    if registry is None:
-        registry = _extract_models_from_dict(data)
+    data = ParseFlow(text, on_section)
+    if "$models" in data:
+        # A later non-section $models value replaces any parsed models
+        del data["$models"]
+        if extract:
+            registry = models_obj = None
+    elif models_obj is not None:
+        registry = _extract_models(models_obj)
 
     # Check for use_model directive
-    if registry and "use_model" in data:
+    final_model: Optional[ModelDefinition] = None
+    if registry is not None and "use_model" in data:
         model_name = data["use_model"]
-        model = registry.get_model(model_name)
+        final_model = registry.get_model(model_name)
 
-        if model is None:
+        if final_model is None:
             raise ValueError(f"Model '{model_name}' not found in registry")
 
-        # Remove use_model and $models from result
-        result = {k: v for k, v in data.items() if k not in ["use_model", "$models"]}
-
-        # Apply model to all top-level values
-        final_result = {}
-        for key, value in result.items():
+    if model is not None and model is not final_model:
+        # use_model or $models changed after sections were already
+        # expanded with the earlier model; start over from a plain parse
+        data = ParseFlow(text)
+        data.pop("$models", None)
+        pending = dict.fromkeys(data)
+
+    if final_model is not None:
+        del data["use_model"]
+        for key in pending:
+            value = data.get(key)
             if isinstance(value, dict):
-                final_result[key] = _apply_model_to_dict(value, model)
-            elif isinstance(value, list):
-                final_result[key] = [
-                    _apply_model_to_dict(item, model) if isinstance(item, dict) else item
-                    for item in value
-                ]
-            else:
-                final_result[key] = value
-
-        return final_result
-
-    # No model application needed
-    # Remove $models from output if present
-    if "$models" in data:
-        return {k: v for k, v in data.items() if k != "$models"}
+                _apply_model_to_dict(value, final_model)
 
     return data
 